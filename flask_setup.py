@@ -1,10 +1,7 @@
 """This script initializes a new Flask project"""
-import argparse
 import os
-import shutil
-import subprocess
 import sys
-import pkg_resources
+from pathlib import Path
 
 
 APP_BASE = """
@@ -32,6 +29,18 @@ CONTENT = ""
 
 CONFIG_BASE = r"""
 import os
+from types import MappingProxyType
+
+# Retrieve database credentials from environment variables once at import time
+_ENV = MappingProxyType({
+    key: os.getenv(key, default)
+    for key, default in (
+        ('DB_USERNAME', 'default_username'),
+        ('DB_PASSWORD', 'default_password'),
+        ('DB_HOSTNAME', 'localhost'),
+        ('DB_NAME', 'database_name'),
+    )
+})
 
 class Config:
     DEBUG = False
@@ -45,19 +54,11 @@ class Config:
         'description': '',
         'uiversion': 3
     }
-    
-    # Retrieve database credentials from environment variables
-    username = os.getenv('DB_USERNAME', 'default_username')
-    password = os.getenv('DB_PASSWORD', 'default_password')
-    hostname = os.getenv('DB_HOSTNAME', 'localhost')
-    database_name = os.getenv('DB_NAME', 'database_name')
-
-    # Construct SQLAlchemy URL with placeholders
-    SQLALCHEMY_DATABASE_URI = 'postgresql://{username}:{password}@{hostname}/{database_name}'.format(
-        username=username,
-        password=password,
-        hostname=hostname,
-        database_name=database_name
+
+    # Construct SQLAlchemy URL from the cached credentials
+    SQLALCHEMY_DATABASE_URI = (
+        f"postgresql://{_ENV['DB_USERNAME']}:{_ENV['DB_PASSWORD']}"
+        f"@{_ENV['DB_HOSTNAME']}/{_ENV['DB_NAME']}"
     )
 
 class ProductionConfig(Config):
@@ -97,36 +98,162 @@ Flask-SQLAlchemy
 flasgger 
 """
 
+# Templates encoded once so every write skips the text layer
+APP_BASE_B = APP_BASE.encode("utf-8")
+CONFIG_BASE_B = CONFIG_BASE.encode("utf-8")
+REQ_BASE_B = REQ_BASE.encode("utf-8")
+
+
+def _write_bytes(path: Path, buf: bytes, exclusive: bool = False) -> bool:
+    """
+    Write pre-encoded bytes to a file with a raw file descriptor.
+
+    Parameters:
+    path (Path): The path of the file to be written.
+    buf (bytes): The encoded content to be written to the file.
+    exclusive (bool): Leave the file untouched if it already exists.
+
+    Returns:
+    bool: True if the file was written, False if it already existed.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | (os.O_EXCL if exclusive else os.O_TRUNC)
+    try:
+        fd = os.open(path, flags, 0o644)
+    except FileExistsError:
+        return False
+    try:
+        view = memoryview(buf)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
+    return True
+
+
+def _create_folder(path: Path, name: str) -> bool:
+    """
+    Create a folder and report it, unless it already exists.
+
+    Parameters:
+    path (Path): The path of the folder to be created.
+    name (str): The name of the folder used in the message.
+
+    Returns:
+    bool: True if the folder was created, False if it already existed.
+    """
+    try:
+        path.mkdir(parents=True)
+    except FileExistsError:
+        return False
+    print(f"Created {name} folder")
+    return True
+
 
 def create_module_folder_and_template(
-    module: str, modules_dir: str, template_dir: str
-) -> None:
+    module: str, modules_dir: Path, template_dir: Path
+) -> bool:
     """
     Create a module folder and template folder with the given name in the specified directories.
 
     Parameters:
     module (str): The name of the module folder and template folder to be created.
-    modules_dir (str): The directory where the module folder should be created.
-    template_dir (str): The directory where the template folder should be created.
+    modules_dir (Path): The directory where the module folder should be created.
+    template_dir (Path): The directory where the template folder should be created.
+
+    Returns:
+    bool: True if the module file was created, False if it already existed.
+    """
+    module_dir = modules_dir / module
+    try:
+        module_dir.mkdir(parents=True)
+    except FileExistsError:
+        # The module was created by an earlier run, leave it untouched
+        created = False
+    else:
+        body = (
+            "from flask import Blueprint\n"
+            f"{module}_bp = Blueprint('{module}', __name__, url_prefix='{module}')\n"
+        )
+        created = _write_bytes(
+            module_dir / f"{module}.py", body.encode("utf-8"), exclusive=True
+        )
+
+    (template_dir / module).mkdir(parents=True, exist_ok=True)
+    return created
+
+
+def _create_modules(modules, modules_dir: Path, template_dir: Path) -> None:
+    """
+    Create the folders of every module, concurrently when there are several.
+
+    Parameters:
+    modules (list[str]): The names of the modules to be created.
+    modules_dir (Path): The directory where the module folders should be created.
+    template_dir (Path): The directory where the template folders should be created.
 
     Returns:
     None
     """
-    module_dir = f"{modules_dir}/{module}"
-    if not os.path.exists(module_dir):
-        os.makedirs(module_dir)
-        with open(f"{module_dir}/{module}.py", "w", encoding="utf-8") as file:
-            file.write("from flask import Blueprint")
-            file.write("\n")
-            file.write(
-                f"{module}_bp = Blueprint('{module}', __name__,url_prefix='{module}')"
+    if len(modules) > 1:
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(32, len(modules))) as executor:
+            created = list(
+                executor.map(
+                    lambda module: create_module_folder_and_template(
+                        module, modules_dir, template_dir
+                    ),
+                    modules,
+                )
             )
+    else:
+        created = [
+            create_module_folder_and_template(module, modules_dir, template_dir)
+            for module in modules
+        ]
 
-        print(f"Created {module} folder")
+    # Print from the main thread so the output is not interleaved
+    for module, module_created in zip(modules, created):
+        if module_created:
+            print(f"Created {module} folder")
 
-    template_dirs = f"{template_dir}/{module}"
-    if not os.path.exists(template_dirs):
-        os.makedirs(template_dirs)
+
+def _register_blueprints(application_file: Path, modules) -> None:
+    """
+    Append the blueprints of the modules that are not registered yet.
+
+    Parameters:
+    application_file (Path): The application.py file of the project.
+    modules (list[str]): The names of the modules to be registered.
+
+    Returns:
+    None
+    """
+    with open(application_file, "r+", encoding="utf-8") as file:
+        # Read the file once into a set of stripped lines
+        existing = {line.strip() for line in file}
+
+        # Collect the lines of every module that is not registered yet
+        missing = []
+        for module in modules:
+            import_line = f"from modules.{module} import {module}_bp"
+            register_line = f"app.register_blueprint({module}_bp)"
+            if import_line not in existing or register_line not in existing:
+                missing.append(module)
+
+        # If the lines are not present, add them to the file
+        if missing:
+            file.write(
+                "\n"
+                + "".join(
+                    f"from modules.{module} import {module}_bp\n"
+                    f"app.register_blueprint({module}_bp)\n"
+                    for module in missing
+                )
+            )
+            for module in missing:
+                print(f"Added {module} blueprint to application.py file")
 
 
 def init_project(project_name, modules=None):
@@ -137,78 +264,53 @@ def init_project(project_name, modules=None):
         modules (list[str]): Name of submodules
     """
     # Create project root directory
-    root_dir = f"{project_name}"
-    if not os.path.exists(root_dir):
-        os.makedirs(root_dir)
-        print(f"Created {project_name} folder")
+    root_dir = Path(project_name)
+    if _create_folder(root_dir, project_name):
+        present = set()
+    else:
+        # List the root once instead of probing every entry separately
+        with os.scandir(root_dir) as entries:
+            present = {entry.name for entry in entries}
 
     # Create application.py file
-    application_file = f"{root_dir}/application.py"
-    if not os.path.exists(application_file):
-        with open(application_file, "w", encoding="utf-8") as file:
-            file.write(APP_BASE)
+    application_file = root_dir / "application.py"
+    if "application.py" not in present and _write_bytes(
+        application_file, APP_BASE_B, exclusive=True
+    ):
         print("Created application.py file")
     # Create db.py file
-    db_file = f"{root_dir}/db.py"
-    if not os.path.exists(db_file):
-        with open(db_file, "w", encoding="utf-8") as file:
-            file.write("# Flask project database file")
+    db_file = root_dir / "db.py"
+    if "db.py" not in present:
+        _write_bytes(db_file, b"# Flask project database file", exclusive=True)
 
     # Create config.py file
-    config_file = f"{root_dir}/config.py"
-    if not os.path.exists(config_file):
-        with open(config_file, "w", encoding="utf-8") as file:
-            file.write(CONFIG_BASE)
+    config_file = root_dir / "config.py"
+    if "config.py" not in present and _write_bytes(
+        config_file, CONFIG_BASE_B, exclusive=True
+    ):
         print("Created config.py file")
 
     # Create templates directory
-    template_dir = f"{root_dir}/templates"
-    if not os.path.exists(template_dir):
-        os.makedirs(template_dir)
-        print("Created templates folder")
+    template_dir = root_dir / "templates"
+    if "templates" not in present:
+        _create_folder(template_dir, "templates")
 
     # Create modules directory inside templates
 
     # Create modules directory
-    modules_dir = f"{root_dir}/modules"
-    if not os.path.exists(modules_dir):
-        os.makedirs(modules_dir)
-        print("Created modules folder")
+    modules_dir = root_dir / "modules"
+    if "modules" not in present:
+        _create_folder(modules_dir, "modules")
 
     # Iterate over the modules and create them in the given directory
-    for module in modules:
-        create_module_folder_and_template(module, modules_dir, template_dir)
+    _create_modules(modules, modules_dir, template_dir)
     # Create static directory
-    static_dir = f"{root_dir}/static"
-    if not os.path.exists(static_dir):
-        os.makedirs(static_dir)
-        print("Created static folder")
+    static_dir = root_dir / "static"
+    if "static" not in present:
+        _create_folder(static_dir, "static")
 
     # Add blueprints to application.py
-    with open(application_file, "r", encoding="utf-8") as file:
-        # Read the file into a list of lines
-        lines = file.readlines()
-
-    # Check if the lines are not already present in the file
-    lines_present = all(
-        any(
-            line.strip() == f"from modules.{module} import {module}_bp"
-            for line in lines
-        )
-        and any(
-            line.strip() == f"app.register_blueprint({module}_bp)" for line in lines
-        )
-        for module in modules
-    )
-
-    # If the lines are not present, add them to the file
-    if not lines_present:
-        with open(application_file, "a", encoding="utf-8") as file:
-            file.write("\n")
-            for module in modules:
-                file.write(f"from modules.{module} import {module}_bp\n")
-                file.write(f"app.register_blueprint({module}_bp)\n")
-                print(f"Added {module} blueprint to application.py file")
+    _register_blueprints(application_file, modules)
 
 
 def remove_project(directory):
@@ -221,9 +323,11 @@ def remove_project(directory):
     Returns:
         None
     """
+    import shutil  # pylint: disable=import-outside-toplevel
+
     # Check if the directory exists
     if not os.path.exists(directory):
-        raise ValueError(f"Error: directory {directory} does not exist")
+        raise ValueError(f"directory {directory} does not exist")
     # Confirm with the user before deleting the directory
     confirm = input(
         f"Are you sure you want to delete the directory {directory} and all its contents? [y/N] "
@@ -245,15 +349,59 @@ def create_utility_files(project_name):
         project_name (str): project name
     """
     # Create project root directory
-    util_file = f"{project_name}/.gitignore"
-    req_file = f"{project_name}/requirements.txt"
-    with open(util_file, "w", encoding="utf-8") as file:
-        file.write(CONTENT)
-        file.write(f"{project_name}")
+    root_dir = Path(project_name)
+    _write_bytes(root_dir / ".gitignore", f"{CONTENT}{project_name}".encode("utf-8"))
+    _write_bytes(root_dir / "requirements.txt", REQ_BASE_B)
+
 
-    with open(req_file, "w", encoding="utf-8") as file:
-        file.write(REQ_BASE)
+def format_project(project_name, modules):
+    """Format the generated python files with black in-process
+
+    Args:
+        project_name (str): project name
+        modules (list[str]): Name of submodules
 
+    Raises:
+        ValueError: If black cannot parse one of the generated files.
+    """
+    root_dir = Path(project_name)
+    files = [root_dir / name for name in ("application.py", "config.py", "db.py")]
+    files += [root_dir / "modules" / module / f"{module}.py" for module in modules]
+    files = [file for file in files if file.exists()]
+
+    try:
+        import black  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        # pylint: disable=import-outside-toplevel
+        import importlib
+        import subprocess
+
+        subprocess.run(
+            [sys.executable, "-m", "pip", "install", "black"],
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        importlib.invalidate_caches()
+        try:
+            import black
+        except ImportError:
+            # A --user install is not on sys.path until the next interpreter
+            subprocess.run(
+                [sys.executable, "-m", "black", *map(str, files)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=True,
+            )
+            return
+
+    mode = black.Mode()
+    for file in files:
+        try:
+            black.format_file_in_place(
+                file, fast=True, mode=mode, write_back=black.WriteBack.YES
+            )
+        except black.InvalidInput as error:
+            raise ValueError(f"black cannot format {file}: {error}") from error
 
 def main():
     """
@@ -273,6 +421,11 @@ def main():
     Returns:
     None
     """
+    # pylint: disable=import-outside-toplevel
+    import argparse
+    import keyword
+    import subprocess
+
     try:
 
         # Create an ArgumentParser object
@@ -305,12 +458,23 @@ def main():
 
         # Parse the arguments
         args = parser.parse_args()
+        if args.modules and not (args.init or args.remove):
+            parser.error("--module requires --init or --remove")
+        # Module names end up in generated python code
+        if args.init and args.modules:
+            invalid = [
+                module
+                for module in args.modules
+                if not module.isidentifier() or keyword.iskeyword(module)
+            ]
+            if invalid:
+                parser.error(f"invalid module name: {', '.join(invalid)}")
         # Check if the init argument is present
         project_path = ""
         if args.init:
             # Call the initialize_directory function with the given directory name
             project_path = os.path.join(args.path, args.init)
-            init_project(project_path, [])
+            init_project(project_path, args.modules or [])
             create_utility_files(project_path)
 
         # Check if the remove argument is present
@@ -323,33 +487,13 @@ def main():
             else:
                 remove_project(args.remove)
 
-        # Check if the module argument is present
-        if args.modules:
-            # Get the directory name from the init argument
-            directory = args.init
-
-            # Check if the directory exists
-            if not os.path.exists(directory):
-                print(f"Error: directory {directory} does not exist")
-            else:
-                init_project(args.init, args.modules)
-        try:
-            pkg_resources.get_distribution("black")
-        except pkg_resources.DistributionNotFound:
-            subprocess.run(
-                ["pip", "install", "black"], stdout=subprocess.DEVNULL, check=True
-            )
         if project_path != "":
-            subprocess.run(
-                ["python", "-m", "black", f"{project_path}"],
-                stdout=subprocess.DEVNULL,
-                check=True,
-            )
+            format_project(project_path, args.modules or [])
 
     except (
         argparse.ArgumentError,
         OSError,
-        pkg_resources.DistributionNotFound,
+        ValueError,
         subprocess.CalledProcessError,
     ) as error:
         print(f"Error: {error}")